@@ -3,12 +3,41 @@
 from __future__ import annotations
 
 import dataclasses
+import functools
 import hashlib
 import json
 import time
-from typing import Any, Dict, Iterable, List, Mapping, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Tuple
+from urllib.parse import urlencode
 
-import requests
+if TYPE_CHECKING:
+    import requests
+
+# `requests` and `orjson` are imported on first use rather than at module load,
+# so registering the plugin does not pay for their import trees.
+
+
+@functools.lru_cache(maxsize=None)
+def _requests() -> Any:
+    import requests
+
+    return requests
+
+
+@functools.lru_cache(maxsize=None)
+def _json_loads() -> Callable[[bytes], Any]:
+    try:
+        import orjson
+    except ImportError:  # pragma: no cover - optional speedup
+        return json.loads
+    return orjson.loads
+
+
+_MISSING = object()
+_FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+_STALE_NOTICE = "注意: 面板请求失败，以下为缓存数据"
+_MAX_STALE_FACTOR = 6
+_STATUS_FIELDS = tuple((key, key.upper()) for key in ("cpu", "mem", "disk", "network"))
 
 
 class BtPanelError(RuntimeError):
@@ -24,9 +53,17 @@ class BtPanelConfig:
     timeout_seconds: int = 10
     verify_tls: bool = True
     token_mode: str = "time+md5key"
+    _base_url: str = dataclasses.field(init=False, repr=False, compare=False)
+    _api_key_md5: bytes = dataclasses.field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # The config is frozen, so values derived from it only need computing once.
+        object.__setattr__(self, "_base_url", self.base_url.rstrip("/"))
+        key_hash = hashlib.md5(self.api_key.encode("utf-8"), usedforsecurity=False)
+        object.__setattr__(self, "_api_key_md5", key_hash.hexdigest().encode("ascii"))
 
     def normalized_base_url(self) -> str:
-        return self.base_url.rstrip("/")
+        return self._base_url
 
 
 @dataclasses.dataclass
@@ -34,19 +71,19 @@ class BtPanelResponse:
     """Normalized response for BT Panel API calls."""
 
     raw: Mapping[str, Any]
+    stale: bool = False
 
     def message(self) -> str:
+        raw = self.raw
         for key in ("msg", "message", "error"):
-            if key in self.raw:
-                return str(self.raw[key])
+            value = raw.get(key, _MISSING)
+            if value is not _MISSING:
+                return str(value)
         return "OK"
 
     def is_success(self) -> bool:
-        if "status" in self.raw:
-            return bool(self.raw["status"])
-        if "success" in self.raw:
-            return bool(self.raw["success"])
-        return True
+        raw = self.raw
+        return bool(raw.get("status", raw.get("success", True)))
 
 
 class BtPanelClient:
@@ -54,86 +91,137 @@ class BtPanelClient:
 
     def __init__(self, config: BtPanelConfig, session: Optional[requests.Session] = None) -> None:
         self._config = config
-        self._session = session or requests.Session()
+        self._session = session
+        base_url = config.normalized_base_url()
+        self._url_status = f"{base_url}/system?action=GetSystemTotal"
+        self._url_sites = f"{base_url}/data?action=getData"
+        self._url_reboot = f"{base_url}/system?action=RebootPanel"
+        self._cache: Dict[Tuple[str, FrozenSet[Tuple[str, Any]]], Tuple[float, BtPanelResponse]] = {}
 
     @property
     def config(self) -> BtPanelConfig:
         return self._config
 
+    def _get_session(self) -> requests.Session:
+        if self._session is None:
+            self._session = self._build_session()
+        return self._session
+
+    @staticmethod
+    def _build_session() -> requests.Session:
+        from requests.adapters import HTTPAdapter
+
+        # A client only ever talks to one panel host, so a single small pool
+        # with keep-alive is enough to reuse the TLS connection between calls.
+        session = _requests().Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Connection"] = "keep-alive"
+        return session
+
     def _build_auth_payload(self) -> Dict[str, str]:
-        request_time = str(int(time.time()))
+        request_time = int(time.time())
         if self._config.token_mode == "time+key":
-            token_seed = f"{request_time}{self._config.api_key}"
+            token_seed = b"%d%b" % (request_time, self._config.api_key.encode("utf-8"))
         elif self._config.token_mode == "time+md5key":
-            key_hash = hashlib.md5(self._config.api_key.encode("utf-8")).hexdigest()
-            token_seed = f"{request_time}{key_hash}"
+            token_seed = b"%d%b" % (request_time, self._config._api_key_md5)
         else:
             raise BtPanelError(f"Unsupported token_mode: {self._config.token_mode}")
-        request_token = hashlib.md5(token_seed.encode("utf-8")).hexdigest()
-        return {"request_time": request_time, "request_token": request_token}
-
-    def _post(self, path: str, payload: Optional[Mapping[str, Any]] = None) -> BtPanelResponse:
-        url = f"{self._config.normalized_base_url()}{path}"
-        data = dict(self._build_auth_payload())
-        if payload:
-            data.update(payload)
+        # The MD5 here is the panel's shared-secret token scheme, not an integrity check.
+        request_token = hashlib.md5(token_seed, usedforsecurity=False).hexdigest()
+        return {"request_time": str(request_time), "request_token": request_token}
+
+    def _post_url(self, url: str, payload: Optional[Mapping[str, Any]] = None) -> BtPanelResponse:
+        auth = self._build_auth_payload()
+        data = {**auth, **payload} if payload else auth
+        req = _requests()
         try:
-            response = self._session.post(
+            response = self._get_session().post(
                 url,
-                data=data,
+                data=urlencode(data).encode("ascii"),
+                headers=_FORM_HEADERS,
                 timeout=self._config.timeout_seconds,
                 verify=self._config.verify_tls,
             )
-        except requests.RequestException as exc:
+        except req.RequestException as exc:
             raise BtPanelError(f"Request failed: {exc}") from exc
         if response.status_code >= 400:
             raise BtPanelError(f"HTTP {response.status_code}: {response.text}")
         try:
-            parsed = response.json()
-        except json.JSONDecodeError as exc:
+            parsed = _json_loads()(response.content)
+        except ValueError as exc:
+            # Covers json/orjson decode errors and UnicodeDecodeError from
+            # the stdlib parser on bodies that are not valid UTF-8.
             raise BtPanelError(f"Invalid JSON response: {response.text}") from exc
         if not isinstance(parsed, Mapping):
             raise BtPanelError("Unexpected response format (expected JSON object)")
         return BtPanelResponse(raw=parsed)
 
+    def _post_cached(
+        self,
+        url: str,
+        payload: Optional[Mapping[str, Any]] = None,
+        ttl: float = 0,
+    ) -> BtPanelResponse:
+        """Like `_post_url`, but reuse a successful response younger than `ttl` seconds.
+
+        When the request fails, a cached response up to `ttl * _MAX_STALE_FACTOR`
+        seconds old is returned with `stale` set; older entries are dropped and
+        the error is raised.
+        """
+        key = (url, frozenset((payload or {}).items()))
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        try:
+            response = self._post_url(url, payload)
+        except BtPanelError:
+            if cached is not None:
+                if time.monotonic() - cached[0] < ttl * _MAX_STALE_FACTOR:
+                    return dataclasses.replace(cached[1], stale=True)
+                del self._cache[key]
+            raise
+        # BT Panel reports errors as HTTP 200 with status false; never reuse those.
+        if response.is_success():
+            self._cache[key] = (time.monotonic(), response)
+        return response
+
     def get_system_status(self) -> BtPanelResponse:
-        return self._post("/system?action=GetSystemTotal")
+        return self._post_cached(self._url_status, ttl=5)
 
     def list_sites(self) -> BtPanelResponse:
-        return self._post("/data?action=getData", {"table": "sites", "limit": 15, "p": 1})
+        return self._post_cached(self._url_sites, {"table": "sites", "limit": 15, "p": 1}, ttl=30)
 
     def restart_panel(self) -> BtPanelResponse:
-        return self._post("/system?action=RebootPanel")
+        return self._post_url(self._url_reboot)
 
 
 def format_system_status(response: BtPanelResponse) -> str:
     data = response.raw
     lines: List[str] = ["BT Panel 系统状态:"]
-    if "system" in data and isinstance(data["system"], str):
-        lines.append(f"系统版本: {data['system']}")
-    for key in ("cpu", "mem", "disk", "network"):
-        if key in data:
-            lines.append(f"{key.upper()}: {data[key]}")
+    if response.stale:
+        lines.append(_STALE_NOTICE)
+    system = data.get("system")
+    if isinstance(system, str):
+        lines.append(f"系统版本: {system}")
+    rows = [(label, data.get(key, _MISSING)) for key, label in _STATUS_FIELDS]
+    lines.extend(f"{label}: {value}" for label, value in rows if value is not _MISSING)
     lines.append(f"消息: {response.message()}")
     return "\n".join(lines)
 
 
 def format_site_list(response: BtPanelResponse) -> str:
     data = response.raw
-    items: Iterable[Mapping[str, Any]] = []
-    if "data" in data and isinstance(data["data"], Iterable):
-        items = data["data"]
-    lines = ["站点列表:"]
-    count = 0
-    for item in items:
-        if not isinstance(item, Mapping):
-            continue
-        name = item.get("name", "未知站点")
-        status = "运行" if item.get("status") else "停止"
-        domains = item.get("domain", "")
-        lines.append(f"- {name} ({status}) {domains}")
-        count += 1
-    if count == 0:
-        lines.append("暂无站点数据")
-    lines.append(f"消息: {response.message()}")
-    return "\n".join(lines)
+    rows = data.get("data")
+    if not isinstance(rows, list):
+        rows = []
+    # Panel JSON is decoded into plain dicts, so the cheaper dict check suffices.
+    body = "\n".join(
+        f"- {row.get('name', '未知站点')} ({'运行' if row.get('status') else '停止'}) "
+        f"{row.get('domain', '')}"
+        for row in rows
+        if isinstance(row, dict)
+    )
+    notice = f"{_STALE_NOTICE}\n" if response.stale else ""
+    return f"站点列表:\n{notice}{body or '暂无站点数据'}\n消息: {response.message()}"
@@ -28,25 +28,20 @@ def _load_config(config: Optional[Dict[str, Any]]) -> BtPanelConfig:
         raise BtPanelError(f"Missing config key: {exc}") from exc
 
 
-def _handle_command(client: BtPanelClient, command: str) -> str:
-    if command == "bt status":
-        response = client.get_system_status()
-        return format_system_status(response)
-    if command == "bt sites":
-        response = client.list_sites()
-        return format_site_list(response)
-    if command == "bt restart panel":
-        response = client.restart_panel()
-        return f"面板重启结果: {response.message()}"
-    if command == "bt help":
-        return (
-            "可用命令:\n"
-            "- bt status\n"
-            "- bt sites\n"
-            "- bt restart panel\n"
-            "- bt help"
-        )
-    return "未知命令，请使用 bt help 查看支持的命令。"
+_HELP_TEXT = (
+    "可用命令:\n"
+    "- bt status\n"
+    "- bt sites\n"
+    "- bt restart panel\n"
+    "- bt help"
+)
+
+_HANDLERS: Dict[str, Callable[[BtPanelClient], str]] = {
+    "bt status": lambda client: format_system_status(client.get_system_status()),
+    "bt sites": lambda client: format_site_list(client.list_sites()),
+    "bt restart panel": lambda client: f"面板重启结果: {client.restart_panel().message()}",
+    "bt help": lambda client: _HELP_TEXT,
+}
 
 
 def register(bot: Any, config: Optional[Dict[str, Any]] = None) -> None:
@@ -60,16 +55,19 @@ def register(bot: Any, config: Optional[Dict[str, Any]] = None) -> None:
     client = BtPanelClient(panel_config)
 
     def make_handler(command: str) -> Callable[[], str]:
+        run = _HANDLERS[command]
+
         def handler() -> str:
             try:
-                return _handle_command(client, command)
+                return run(client)
             except BtPanelError as exc:
                 return f"BT Panel 请求失败: {exc}"
 
         return handler
 
-    if not hasattr(bot, "register_command"):
+    register_command = getattr(bot, "register_command", None)
+    if register_command is None:
         raise BtPanelError("Bot does not support register_command")
 
-    for command in ("bt status", "bt sites", "bt restart panel", "bt help"):
-        bot.register_command(command, make_handler(command))
+    for command in _HANDLERS:
+        register_command(command, make_handler(command))